@@ -1,11 +1,14 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from nba_api.live.nba.endpoints import scoreboard, playbyplay, boxscore
 from nba_api.stats.endpoints import leaguegamefinder, alltimeleadersgrids, leagueleaders, leaguestandingsv3, scoreboardv2
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
-import os, logging, threading, time, pytz, csv, re, requests
+import os, sys, logging, threading, time, pytz, csv, re, requests, click, bisect, unicodedata, queue, json
 import numpy as np
 import pandas as pd
 
@@ -28,10 +31,20 @@ MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("MONGO_URI is not set. Check your .env file.")
 
+# Only one instance should poll the NBA API and write LiveGames; every other
+# instance follows the collection. A single instance ingests by default; when
+# running several, set LIVE_INGESTER=false on all but one.
+LIVE_INGESTER = os.getenv("LIVE_INGESTER", "true").lower() == "true"
+LIVE_INGEST_INTERVAL = 15  # Seconds between upstream scoreboard polls
+LIVE_STATE_POLL_INTERVAL = 5  # Seconds between LiveGames reads when change streams are unavailable
+
 client = MongoClient(MONGO_URI)
 db = client["NBA_DB"]
 live_games_collection = db["LiveGames"]
 past_games_collection = db["PastGames"]
+backfill_progress_collection = db["BackfillProgress"]
+team_stats_collection = db["TeamSeasonStats"]
+play_by_play_collection = db["PlayByPlay"]
 
 # CSV File Path
 CSV_FILE = "nba_game_updates.csv"
@@ -49,6 +62,35 @@ NBA_TEAMS = {
     "POR", "SAC", "SAS", "TOR", "UTA", "WAS"
 }
 
+TEAM_CODE_TO_ID = {
+    "ATL": 1610612737, "BOS": 1610612738, "BKN": 1610612751, "CHA": 1610612766,
+    "CHI": 1610612741, "CLE": 1610612739, "DAL": 1610612742, "DEN": 1610612743,
+    "DET": 1610612765, "GSW": 1610612744, "HOU": 1610612745, "IND": 1610612754,
+    "LAC": 1610612746, "LAL": 1610612747, "MEM": 1610612763, "MIA": 1610612748,
+    "MIL": 1610612749, "MIN": 1610612750, "NOP": 1610612740, "NYK": 1610612752,
+    "OKC": 1610612760, "ORL": 1610612753, "PHI": 1610612755, "PHX": 1610612756,
+    "POR": 1610612757, "SAC": 1610612758, "SAS": 1610612759, "TOR": 1610612761,
+    "UTA": 1610612762, "WAS": 1610612764,
+}
+
+# Current conference and division alignment, used until standings are attached
+TEAM_DIVISIONS = {
+    "BOS": ("East", "Atlantic"), "BKN": ("East", "Atlantic"), "NYK": ("East", "Atlantic"),
+    "PHI": ("East", "Atlantic"), "TOR": ("East", "Atlantic"),
+    "CHI": ("East", "Central"), "CLE": ("East", "Central"), "DET": ("East", "Central"),
+    "IND": ("East", "Central"), "MIL": ("East", "Central"),
+    "ATL": ("East", "Southeast"), "CHA": ("East", "Southeast"), "MIA": ("East", "Southeast"),
+    "ORL": ("East", "Southeast"), "WAS": ("East", "Southeast"),
+    "DEN": ("West", "Northwest"), "MIN": ("West", "Northwest"), "OKC": ("West", "Northwest"),
+    "POR": ("West", "Northwest"), "UTA": ("West", "Northwest"),
+    "GSW": ("West", "Pacific"), "LAC": ("West", "Pacific"), "LAL": ("West", "Pacific"),
+    "PHX": ("West", "Pacific"), "SAC": ("West", "Pacific"),
+    "DAL": ("West", "Southwest"), "HOU": ("West", "Southwest"), "MEM": ("West", "Southwest"),
+    "NOP": ("West", "Southwest"), "SAS": ("West", "Southwest"),
+}
+
+CURRENT_SEASON = "2024-25"
+
 # Get current PST date
 def get_today_pst():
     return datetime.now(timezone.utc).astimezone(PST).date()
@@ -117,8 +159,8 @@ def fetch_live_games():
         today_pst = get_today_pst()
         updated_count = 0
 
-        # Clear old live games (Keep only today's games)
-        live_games_collection.delete_many({"date": {"$lt": datetime.combine(today_pst, datetime.min.time(), PST)}})
+        # Archive old live games (Keep only today's games)
+        archive_live_games(datetime.combine(today_pst, datetime.min.time(), PST))
 
         for game in games:
             game_id = game.get("gameId", "N/A")
@@ -131,21 +173,27 @@ def fetch_live_games():
             if home_team in NBA_TEAMS and away_team in NBA_TEAMS and game_date.astimezone(PST).date() == today_pst:
                 game_data = {
                     "gameId": game_id,
+                    "date": game_date,
                     "gameTimePST": convert_to_pst(game_date_str),
+                    "gameStatus": game.get("gameStatus", 0),
                     "period": game.get("period", 0),
-                    "gameClock": game.get("gameClock", "00:00"),
+                    "gameClock": format_game_clock(game.get("gameClock", "00:00")),
                     "status": convert_status_to_pst(game.get("gameStatusText", "Unknown")),
                     "homeTeam": {
                         "teamId": game.get("homeTeam", {}).get("teamId", "Unknown"),
                         "teamName": game.get("homeTeam", {}).get("teamName", "Unknown"),
                         "teamTricode": home_team,
                         "score": game.get("homeTeam", {}).get("score", 0),
+                        "wins": game.get("homeTeam", {}).get("wins", 0),
+                        "losses": game.get("homeTeam", {}).get("losses", 0),
                     },
                     "awayTeam": {
                         "teamId": game.get("awayTeam", {}).get("teamId", "Unknown"),
                         "teamName": game.get("awayTeam", {}).get("teamName", "Unknown"),
                         "teamTricode": away_team,
                         "score": game.get("awayTeam", {}).get("score", 0),
+                        "wins": game.get("awayTeam", {}).get("wins", 0),
+                        "losses": game.get("awayTeam", {}).get("losses", 0),
                     },
                     "arena": game.get("arena", {}).get("name", "Unknown"),
                     "location": {
@@ -171,6 +219,31 @@ def fetch_live_games():
     except Exception as e:
         logging.error(f"Error fetching NBA live data: {e}")
 
+# **Live Game Ingester (designated instance only)**
+def clear_legacy_live_games():
+    """
+    Older LiveGames documents have no `date`, so they are never archived, and
+    play-by-play stubs have no teams at all. Archive the former and drop both.
+    """
+    legacy_games = list(live_games_collection.find({"date": {"$exists": False}, "homeTeam": {"$exists": True}}, {"actions": 0}))
+    for game in legacy_games:
+        game.pop("_id", None)
+        past_games_collection.update_one({"gameId": game["gameId"]}, {"$set": game}, upsert=True)
+
+    result = live_games_collection.delete_many({"$or": [{"date": {"$exists": False}}, {"homeTeam": {"$exists": False}}]})
+    if result.deleted_count:
+        logging.info(f"Cleared {result.deleted_count} legacy LiveGames documents, archived {len(legacy_games)}.")
+
+def run_live_ingester():
+    try:
+        clear_legacy_live_games()
+    except PyMongoError as e:
+        logging.error(f"Error clearing legacy LiveGames documents: {e}")
+
+    while True:
+        fetch_live_games()
+        time.sleep(LIVE_INGEST_INTERVAL)
+
 # **Move Past Games at Midnight PST**
 def move_past_games():
     while True:
@@ -182,28 +255,580 @@ def move_past_games():
         logging.info(f"Waiting {sleep_time} seconds until midnight PST to move games.")
         time.sleep(sleep_time)
 
-        # Move all today's live games to past games
+        # Move the day that just ended from live games to past games
         today_pst = get_today_pst()
-        past_games = list(live_games_collection.find({"date": {"$lt": datetime.combine(today_pst, datetime.max.time(), PST)}}))
-
-        if past_games:
-            for game in past_games:
-                game.pop("_id", None)  # Remove MongoDB Object ID before moving
-                past_games_collection.update_one(
-                    {"gameId": game["gameId"]},
-                    {"$set": game},
+        archive_live_games(datetime.combine(today_pst, datetime.min.time(), PST))
+
+def archive_live_games(cutoff):
+    """
+    Moves LiveGames dated before `cutoff` into PastGames and folds finished
+    games into the team season aggregates.
+    """
+    past_games = list(live_games_collection.find({"date": {"$lt": cutoff}}))
+    if not past_games:
+        return
+
+    for game in past_games:
+        game.pop("_id", None)  # Remove MongoDB Object ID before moving
+        past_games_collection.update_one(
+            {"gameId": game["gameId"]},
+            {"$set": game},
+            upsert=True
+        )
+
+        if game.get("gameStatus") == 3:
+            try:
+                update_team_aggregates(game)
+            except Exception as e:
+                logging.error(f"Error updating team aggregates for game {game['gameId']}: {e}")
+
+    live_games_collection.delete_many({"gameId": {"$in": [game["gameId"] for game in past_games]}})
+    logging.info(f"Moved {len(past_games)} games to PastGames.")
+
+# **Historical Backfill into PastGames**
+BACKFILL_MAX_WORKERS = 4
+BACKFILL_MIN_INTERVAL = 0.6  # Seconds between upstream calls, shared by all workers
+BACKFILL_MAX_RETRIES = 3
+
+class RateLimiter:
+    """
+    Spaces out calls across threads so that no two start closer than
+    `min_interval` seconds apart.
+    """
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_call = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_call - now
+            self.next_call = max(now, self.next_call) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+backfill_limiter = RateLimiter(BACKFILL_MIN_INTERVAL)
+
+def call_with_retries(fetch, *args, **kwargs):
+    """
+    Calls an nba_api endpoint through the backfill rate limiter,
+    retrying with exponential backoff on failure.
+    """
+    for attempt in range(BACKFILL_MAX_RETRIES + 1):
+        backfill_limiter.wait()
+        try:
+            return fetch(*args, **kwargs)
+        except Exception as e:
+            if attempt == BACKFILL_MAX_RETRIES:
+                raise
+            backoff = 2 ** attempt
+            logging.warning(f"Upstream call failed ({e}), retrying in {backoff}s.")
+            time.sleep(backoff)
+
+def season_date_range(season):
+    """
+    Converts a season string like "2024-25" into its (start, end) dates,
+    covering preseason through the Finals. The window runs into October so
+    that delayed seasons (the 2020 bubble, the July 2021 Finals) are included.
+    """
+    start_year = int(season.split("-")[0])
+    return datetime(start_year, 10, 1).date(), datetime(start_year + 1, 10, 15).date()
+
+def season_for_game_id(game_id):
+    """
+    Reads the season out of a game ID: "0022400728" belongs to 2024-25.
+    """
+    year = int(game_id[3:5])
+    start_year = (1900 if year >= 46 else 2000) + year
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+def get_quarter_scores(line):
+    quarters = {"Q1": 0, "Q2": 0, "Q3": 0, "Q4": 0, "OT": 0}
+    for num in range(1, 5):
+        quarters[f"Q{num}"] = int(line.get(f"PTS_QTR{num}") or 0)
+    for num in range(1, 11):
+        quarters["OT"] += int(line.get(f"PTS_OT{num}") or 0)
+    return quarters
+
+def normalize_scoreboard_games(games_df, linescore_df, game_date):
+    """
+    Builds one PastGames document per completed game on a ScoreboardV2 response.
+    Games without a final score are skipped so no "N/A" scores are stored.
+    """
+    lines = {
+        (row["GAME_ID"], row["TEAM_ID"]): row
+        for row in linescore_df.replace({np.nan: None}).to_dict(orient="records")
+    }
+
+    documents = []
+    for game in games_df.to_dict(orient="records"):
+        if game.get("GAME_STATUS_ID") != 3:
+            continue
+
+        game_id = game["GAME_ID"]
+        home = lines.get((game_id, game["HOME_TEAM_ID"]))
+        away = lines.get((game_id, game["VISITOR_TEAM_ID"]))
+        if home is None or away is None or home.get("PTS") is None or away.get("PTS") is None:
+            continue
+
+        documents.append({
+            "gameId": game_id,
+            "date": PST.localize(datetime.combine(game_date, datetime.min.time())),
+            "gameTimePST": game_date.strftime("%Y-%m-%d"),
+            "season": season_for_game_id(game_id),
+            "status": game.get("GAME_STATUS_TEXT", "Final").strip(),
+            "homeTeam": {
+                "teamId": int(home["TEAM_ID"]),
+                "teamTricode": home["TEAM_ABBREVIATION"],
+                "score": int(home["PTS"]),
+                "quarters": get_quarter_scores(home),
+            },
+            "awayTeam": {
+                "teamId": int(away["TEAM_ID"]),
+                "teamTricode": away["TEAM_ABBREVIATION"],
+                "score": int(away["PTS"]),
+                "quarters": get_quarter_scores(away),
+            },
+        })
+
+    return documents
+
+def fetch_boxscore_summary(game_id):
+    """
+    Returns team statistics from the live BoxScore endpoint, or None when
+    the game is too old to be served by it. Not retried: for old games the
+    endpoint fails every time.
+    """
+    try:
+        backfill_limiter.wait()
+        game_data = boxscore.BoxScore(game_id).get_dict().get("game", {})
+    except Exception as e:
+        logging.warning(f"No boxscore available for game {game_id}: {e}")
+        return None
+
+    return {
+        "homeTeam": game_data.get("homeTeam", {}).get("statistics", {}),
+        "awayTeam": game_data.get("awayTeam", {}).get("statistics", {}),
+    }
+
+def backfill_date(game_date, include_boxscores=False):
+    """
+    Fetches every completed game for a single date and upserts them into PastGames.
+    Returns the number of games written and the seasons they belong to.
+    """
+    date_str = game_date.strftime("%m/%d/%Y")
+    board = call_with_retries(scoreboardv2.ScoreboardV2, game_date=date_str)
+    games_df = board.game_header.get_data_frame()
+    linescore_df = board.line_score.get_data_frame()
+
+    documents = normalize_scoreboard_games(games_df, linescore_df, game_date)
+
+    if include_boxscores:
+        for document in documents:
+            summary = fetch_boxscore_summary(document["gameId"])
+            if summary:
+                document["homeTeam"]["statistics"] = summary["homeTeam"]
+                document["awayTeam"]["statistics"] = summary["awayTeam"]
+
+    if documents:
+        past_games_collection.bulk_write(
+            [UpdateOne({"gameId": d["gameId"]}, {"$set": d}, upsert=True) for d in documents],
+            ordered=False
+        )
+
+    return len(documents), {d["season"] for d in documents}
+
+def has_scores(game):
+    return all(isinstance(game.get(side, {}).get("score"), int) for side in ("homeTeam", "awayTeam"))
+
+def dedupe_past_games():
+    """
+    Older PastGames data holds several documents per gameId, often with "N/A"
+    scores. Keeps the best copy of each game, preferring scored and dated ones.
+    """
+    duplicates = past_games_collection.aggregate([
+        {"$group": {"_id": "$gameId", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ], allowDiskUse=True)
+
+    removed = 0
+    for group in duplicates:
+        copies = list(past_games_collection.find({"_id": {"$in": group["ids"]}}))
+        best = max(copies, key=lambda game: (has_scores(game), isinstance(game.get("date"), datetime)))
+        removed += past_games_collection.delete_many(
+            {"_id": {"$in": [game["_id"] for game in copies if game["_id"] != best["_id"]]}}
+        ).deleted_count
+
+    if removed:
+        logging.info(f"Removed {removed} duplicate PastGames documents.")
+
+def ensure_past_games_index():
+    dedupe_past_games()
+    past_games_collection.create_index("gameId", unique=True)
+
+def season_backfill_complete(season):
+    """
+    True when every date of the season's window, up to yesterday, has been
+    backfilled successfully.
+    """
+    start_date, end_date = season_date_range(season)
+    end_date = min(end_date, get_today_pst() - timedelta(days=1))
+    if end_date < start_date:
+        return False
+
+    dates = [(start_date + timedelta(days=i)).isoformat() for i in range((end_date - start_date).days + 1)]
+    done = backfill_progress_collection.count_documents({"_id": {"$in": dates}, "status": "done"})
+    return done == len(dates)
+
+def run_backfill(start_date, end_date, workers=BACKFILL_MAX_WORKERS, include_boxscores=False, restart=False):
+    """
+    Backfills PastGames for every date in [start_date, end_date].
+    Completed dates are checkpointed in BackfillProgress so an interrupted
+    run picks up where it left off; failed dates are retried on the next run.
+    Returns the seasons of the games written.
+    """
+    ensure_past_games_index()
+
+    dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    if restart:
+        backfill_progress_collection.delete_many({"_id": {"$in": [d.isoformat() for d in dates]}})
+    else:
+        done = {
+            doc["_id"] for doc in backfill_progress_collection.find(
+                {"_id": {"$in": [d.isoformat() for d in dates]}, "status": "done"}, {"_id": 1}
+            )
+        }
+        dates = [d for d in dates if d.isoformat() not in done]
+
+    logging.info(f"Backfilling {len(dates)} dates from {start_date} to {end_date} with {workers} workers.")
+
+    total_games = 0
+    failed = 0
+    seasons = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(backfill_date, d, include_boxscores): d for d in dates}
+        for future in as_completed(futures):
+            game_date = futures[future]
+            try:
+                count, date_seasons = future.result()
+                seasons.update(date_seasons)
+                backfill_progress_collection.update_one(
+                    {"_id": game_date.isoformat()},
+                    {"$set": {"status": "done", "games": count, "updatedAt": datetime.now(timezone.utc)}},
                     upsert=True
                 )
+                total_games += count
+                logging.info(f"Backfilled {count} games for {game_date}.")
+            except Exception as e:
+                failed += 1
+                backfill_progress_collection.update_one(
+                    {"_id": game_date.isoformat()},
+                    {"$set": {"status": "failed", "error": str(e), "updatedAt": datetime.now(timezone.utc)}},
+                    upsert=True
+                )
+                logging.error(f"Error backfilling {game_date}: {e}")
+
+    logging.info(f"Backfill finished: {total_games} games written, {failed} dates failed.")
+    return seasons
+
+@app.cli.command("backfill")
+@click.option("--season", multiple=True, help="Season to backfill, e.g. 2023-24. Repeatable.")
+@click.option("--start", "start_param", help="Start date (YYYY-MM-DD).")
+@click.option("--end", "end_param", help="End date (YYYY-MM-DD), defaults to yesterday.")
+@click.option("--workers", default=BACKFILL_MAX_WORKERS, show_default=True, help="Concurrent dates to fetch.")
+@click.option("--boxscores", is_flag=True, help="Also attach team boxscore statistics.")
+@click.option("--restart", is_flag=True, help="Ignore checkpoints and refetch every date.")
+def backfill_command(season, start_param, end_param, workers, boxscores, restart):
+    """Backfill PastGames over a date range or one or more seasons."""
+    ranges = [season_date_range(s) for s in season]
+    if start_param:
+        end_date = (
+            datetime.strptime(end_param, "%Y-%m-%d").date() if end_param
+            else get_today_pst() - timedelta(days=1)
+        )
+        ranges.append((datetime.strptime(start_param, "%Y-%m-%d").date(), end_date))
+
+    if not ranges:
+        raise click.UsageError("Provide --season or --start.")
+
+    yesterday = get_today_pst() - timedelta(days=1)
+    seasons = set(season)
+    for start_date, end_date in ranges:
+        end_date = min(end_date, yesterday)
+        seasons.update(run_backfill(start_date, end_date, workers, boxscores, restart))
+        # Dates skipped by a resumed run: take their seasons from the stored games
+        seasons.update(past_games_collection.distinct("season", {"date": {
+            "$gte": PST.localize(datetime.combine(start_date, datetime.min.time())),
+            "$lt": PST.localize(datetime.combine(end_date + timedelta(days=1), datetime.min.time())),
+        }}))
+
+    # Backfilled games arrive out of order, so rebuild rather than apply them incrementally.
+    # Only seasons whose whole window has been backfilled, so partial records are never rebuilt
+    for backfilled_season in sorted(s for s in seasons if s):
+        if season_backfill_complete(backfilled_season):
+            rebuild_team_aggregates(backfilled_season)
+        else:
+            logging.info(f"Not rebuilding team aggregates for {backfilled_season}: season not fully backfilled.")
+
+# **Materialized Team Season Aggregates**
+SEASON_TYPES = {"002": "Regular Season", "004": "Playoffs"}
 
-            live_games_collection.delete_many({"date": {"$lt": datetime.combine(today_pst, datetime.max.time(), PST)}})
-            logging.info(f"Moved {len(past_games)} games to PastGames.")
+def season_from_game_id(game_id):
+    """
+    Reads season and season type out of a game ID: "0022400728" is a
+    2024-25 regular season game. Returns None for preseason and All-Star games.
+    """
+    season_type = SEASON_TYPES.get(game_id[:3])
+    if not season_type:
+        return None
+    return season_for_game_id(game_id), season_type
+
+team_stats_index_ready = False
+
+def ensure_team_stats_index():
+    """
+    The unique index is what turns re-applying a game into a DuplicateKeyError
+    instead of a second team document, so it must exist before any update.
+    """
+    global team_stats_index_ready
+    if not team_stats_index_ready:
+        team_stats_collection.create_index([("teamId", 1), ("season", 1), ("seasonType", 1)], unique=True)
+        team_stats_index_ready = True
+
+def game_date_label(game):
+    game_date = game.get("date")
+    if not isinstance(game_date, datetime):
+        return game.get("gameTimePST", "N/A")[:10]
+    if game_date.tzinfo is None:
+        game_date = game_date.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC datetimes
+    return game_date.astimezone(PST).strftime("%b %d, %Y").upper()
+
+def update_team_aggregates(game):
+    """
+    Folds one finished game into both teams' TeamSeasonStats documents.
+    Each update is a single atomic pipeline update filtered on the game not
+    having been applied yet, so archiving the same game twice is a no-op.
+    """
+    parsed = season_from_game_id(game["gameId"])
+    if not parsed:
+        return
+    season, season_type = parsed
+    ensure_team_stats_index()
+
+    if not has_scores(game):
+        return  # Legacy documents may hold "N/A" scores
+
+    home, away = game["homeTeam"], game["awayTeam"]
+    if home["score"] == away["score"]:
+        return  # Not a final score
+
+    def add(field, amount):
+        return {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+
+    for team, opponent, side in ((home, away, "home"), (away, home, "away")):
+        points, opponent_points = int(team["score"]), int(opponent["score"])
+        won = int(points > opponent_points)
+        result = "W" if won else "L"
+        matchup = f"{team['teamTricode']} {'vs.' if side == 'home' else '@'} {opponent['teamTricode']}"
+        h2h = f"headToHead.{opponent['teamTricode']}"
+
+        alignment = {}
+        if team["teamTricode"] in TEAM_DIVISIONS:
+            conference, division = TEAM_DIVISIONS[team["teamTricode"]]
+            alignment = {
+                "conference": {"$ifNull": ["$conference", conference]},
+                "division": {"$ifNull": ["$division", division]},
+            }
+
+        update = [{"$set": {
+            **alignment,
+            "teamTricode": team["teamTricode"],
+            "wins": add("wins", won),
+            "losses": add("losses", 1 - won),
+            f"{side}.wins": add(f"{side}.wins", won),
+            f"{side}.losses": add(f"{side}.losses", 1 - won),
+            "pointsFor": add("pointsFor", points),
+            "pointsAgainst": add("pointsAgainst", opponent_points),
+            f"{h2h}.wins": add(f"{h2h}.wins", won),
+            f"{h2h}.losses": add(f"{h2h}.losses", 1 - won),
+            "last10": {"$slice": [{"$concatArrays": [{"$ifNull": ["$last10", []]}, [result]]}, -10]},
+            "streak": {"$cond": [
+                {"$eq": ["$streak.result", result]},
+                {"result": result, "count": add("streak.count", 1)},
+                {"result": result, "count": 1},
+            ]},
+            "games": {"$concatArrays": [{"$ifNull": ["$games", []]}, [{
+                "gameId": game["gameId"],
+                "date": game_date_label(game),
+                "opponent": matchup,
+                "result": f"{result} {points}-{opponent_points}",
+            }]]},
+            "updatedAt": "$$NOW",
+        }}]
+
+        try:
+            team_stats_collection.update_one(
+                {
+                    "teamId": int(team["teamId"]),
+                    "season": season,
+                    "seasonType": season_type,
+                    "games.gameId": {"$ne": game["gameId"]},
+                },
+                update,
+                upsert=True
+            )
+        except DuplicateKeyError:
+            pass  # Game already applied to this team
+
+def refresh_team_standings_info(season):
+    standings_df = get_standings_frame(season)
+    for row in standings_df.to_dict(orient="records"):
+        team_stats_collection.update_many(
+            {"teamId": int(row["TeamID"]), "season": season},
+            {"$set": {"conference": row["Conference"], "division": row["Division"]}}
+        )
+
+def is_final_game(game):
+    return game.get("gameStatus") == 3 or str(game.get("status", "")).startswith("Final")
+
+def rebuild_team_aggregates(season):
+    """
+    Recomputes a season's TeamSeasonStats from PastGames in date order. The
+    documents are marked complete only when the whole season has been
+    backfilled and every game applied; until then team pages keep using
+    the upstream endpoints.
+    """
+    ensure_team_stats_index()
+    team_stats_collection.delete_many({"season": season})
+
+    # Select by the season encoded in the game ID, since delayed seasons overlap on dates
+    games = past_games_collection.find({"gameId": {"$regex": f"^00[24]{season[2:4]}"}}).sort("date", 1)
+
+    count = 0
+    failed = 0
+    for game in games:
+        parsed = season_from_game_id(game["gameId"])
+        if not parsed or parsed[0] != season or not has_scores(game) or not is_final_game(game):
+            continue
+        try:
+            update_team_aggregates(game)
+            count += 1
+        except Exception as e:
+            failed += 1
+            logging.error(f"Error applying game {game['gameId']} to team aggregates: {e}")
+
+    try:
+        refresh_team_standings_info(season)
+    except Exception as e:
+        logging.warning(f"Could not attach conference/division for {season}: {e}")
+
+    complete = failed == 0 and season_backfill_complete(season)
+    team_stats_collection.update_many({"season": season}, {"$set": {"complete": complete}})
+    logging.info(f"Rebuilt team aggregates for {season} from {count} games ({failed} failed, complete={complete}).")
+
+@app.cli.command("rebuild-team-stats")
+@click.option("--season", multiple=True, default=[CURRENT_SEASON], show_default=True, help="Season to rebuild. Repeatable.")
+def rebuild_team_stats_command(season):
+    """Recompute TeamSeasonStats from PastGames."""
+    for s in season:
+        rebuild_team_aggregates(s)
+
+def get_team_aggregates(team_id, projection=None):
+    return team_stats_collection.find_one(
+        {"teamId": team_id, "season": CURRENT_SEASON, "seasonType": "Regular Season"},
+        projection
+    )
+
+# **Upstream Response Cache**
+STANDINGS_TTL = 600
+SCOREBOARD_TTL = 60  # Today's scoreboard, scores are still changing
+SCOREBOARD_SETTLED_TTL = 6 * 3600  # Past dates
+SCOREBOARD_FUTURE_TTL = 600
+SCHEDULED_GAMES_TTL = 3600
+ROSTER_TTL = 6 * 3600
+BOXSCORE_TTL = 20
+BOXSCORE_FINAL_TTL = 24 * 3600
+RESPONSE_CACHE_MAX = 500
+
+response_cache = {}  # key -> (expires_at, value)
+response_cache_lock = threading.Lock()
+
+def cached_fetch(key, ttl, fetch, refresh=False):
+    """
+    Returns the cached value for `key`, calling `fetch` when it is missing,
+    expired, or `refresh` is set. `ttl` may be a function of the fetched value.
+    """
+    if not refresh:
+        with response_cache_lock:
+            entry = response_cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+    value = fetch()
+    expires_at = time.monotonic() + (ttl(value) if callable(ttl) else ttl)
+
+    with response_cache_lock:
+        response_cache.pop(key, None)
+        response_cache[key] = (expires_at, value)
+        while len(response_cache) > RESPONSE_CACHE_MAX:
+            response_cache.pop(next(iter(response_cache)))  # Oldest entry first
+
+    return value
+
+def get_standings_frame(season=CURRENT_SEASON, refresh=False):
+    return cached_fetch(
+        ("standings", season), STANDINGS_TTL,
+        lambda: leaguestandingsv3.LeagueStandingsV3(season=season, season_type="Regular Season").get_data_frames()[0],
+        refresh
+    )
+
+def get_scoreboard_frames(game_date, refresh=False):
+    """
+    Returns (game_header, line_score) data frames for a date.
+    """
+    def fetch():
+        board = scoreboardv2.ScoreboardV2(game_date=game_date.strftime("%m/%d/%Y"))
+        return board.game_header.get_data_frame(), board.line_score.get_data_frame()
+
+    def todays_ttl(frames):
+        # Once every game is final the scoreboard stops changing
+        games_df = frames[0]
+        if not games_df.empty and (games_df["GAME_STATUS_ID"] == 3).all():
+            return SCOREBOARD_SETTLED_TTL
+        return SCOREBOARD_TTL
+
+    today = get_today_pst()
+    if game_date < today - timedelta(days=1):
+        ttl = SCOREBOARD_SETTLED_TTL
+    elif game_date > today:
+        ttl = SCOREBOARD_FUTURE_TTL
+    else:
+        ttl = todays_ttl
+
+    return cached_fetch(("scoreboard", game_date.isoformat()), ttl, fetch, refresh)
+
+def get_team_roster_data(team_id, refresh=False):
+    from nba_api.stats.endpoints import commonteamroster
+
+    def fetch():
+        data = commonteamroster.CommonTeamRoster(team_id=team_id).get_dict()
+        return [
+            {
+                "id": row[14],  # PERSON_ID
+                "name": row[3],
+                "number": row[6],
+                "position": row[7]
+            }
+            for row in data["resultSets"][0]["rowSet"]
+        ]
+
+    return cached_fetch(("roster", team_id), ROSTER_TTL, fetch, refresh)
 
 # **Past Games API**
 @app.route("/past-games", methods=["GET"])
 def get_past_games():
     try:
-        from nba_api.stats.endpoints import leaguestandingsv3
-
         # Optional date param
         date_param = request.args.get("date")
         if date_param:
@@ -215,13 +840,11 @@ def get_past_games():
         logging.info(f"Fetching past games for: {date_str}")
 
         # Get standings data
-        standings_df = leaguestandingsv3.LeagueStandingsV3(season="2024-25").get_data_frames()[0]
+        standings_df = get_standings_frame()
         standings_df = standings_df[["TeamID", "WINS", "LOSSES"]]
 
         # Get scoreboard data
-        scoreboard = scoreboardv2.ScoreboardV2(game_date=date_str)
-        games_df = scoreboard.game_header.get_data_frame()
-        linescore_df = scoreboard.line_score.get_data_frame()
+        games_df, linescore_df = get_scoreboard_frames(game_date.date())
 
         past_games = []
 
@@ -266,19 +889,9 @@ def get_past_games():
         logging.exception("Error in /past-games route")
         return jsonify({"error": str(e)}), 500
     
-@app.route("/scheduled-games", methods=["GET"])
-def get_scheduled_games():
-    try:
-        date_param = request.args.get("date")
-        if date_param:
-            game_date = datetime.strptime(date_param, "%Y-%m-%d")
-        else:
-            game_date = datetime.today() + timedelta(days=1)  # default to tomorrow
-
-        formatted_date = game_date.strftime("%m/%d/%Y")
-
-        scoreboard = scoreboardv2.ScoreboardV2(game_date=formatted_date)
-        games_df = scoreboard.game_header.get_data_frame()
+def build_scheduled_games(game_date, refresh=False):
+    def build():
+        games_df, _ = get_scoreboard_frames(game_date, refresh)
 
         scheduled_games = []
 
@@ -304,7 +917,20 @@ def get_scheduled_games():
                     }
                 })
 
-        return jsonify({ "scheduled_games": scheduled_games })
+        return scheduled_games
+
+    return cached_fetch(("scheduled-games", game_date.isoformat()), SCHEDULED_GAMES_TTL, build, refresh)
+
+@app.route("/scheduled-games", methods=["GET"])
+def get_scheduled_games():
+    try:
+        date_param = request.args.get("date")
+        if date_param:
+            game_date = datetime.strptime(date_param, "%Y-%m-%d")
+        else:
+            game_date = datetime.today() + timedelta(days=1)  # default to tomorrow
+
+        return jsonify({ "scheduled_games": build_scheduled_games(game_date.date()) })
 
     except Exception as e:
         return jsonify({ "error": str(e) }), 500
@@ -321,61 +947,133 @@ def format_game_clock(game_clock):
         return f"{int(minutes):02}:{int(float(seconds)):02}"  # Convert to MM:SS format
     return "00:00"  # Default if format is unexpected
 
-@app.route("/live-games", methods=["GET"])
-def get_live_games():
-    try:
-        logging.info("Fetching live games from NBA API...")
+# **In-Memory Live Game State (followed from LiveGames)**
+live_games_state = {}  # gameId -> game document
+live_game_ids = {}  # Mongo _id -> gameId, needed to resolve delete events
+live_games_lock = threading.Lock()
+live_subscribers = set()
+live_subscribers_lock = threading.Lock()
+
+def notify_live_subscribers(event, data):
+    message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    with live_subscribers_lock:
+        subscribers = list(live_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            pass  # Slow client, it will catch up from the next snapshot
+
+def today_live_games_window():
+    today_pst = get_today_pst()
+    start = PST.localize(datetime.combine(today_pst, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+def is_today_live_game(doc):
+    """
+    Only full game documents dated today (PST) are served as live games.
+    """
+    game_date = doc.get("date")
+    if not doc.get("homeTeam") or not isinstance(game_date, datetime):
+        return False
+    if game_date.tzinfo is None:
+        game_date = game_date.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC datetimes
+    start, end = today_live_games_window()
+    return start <= game_date < end
+
+def set_live_game(doc):
+    doc = dict(doc)
+    object_id = doc.pop("_id", None)
+    game_id = doc.get("gameId")
+    if not game_id:
+        return
+    if not is_today_live_game(doc):
+        remove_live_game(object_id)
+        return
+
+    with live_games_lock:
+        live_game_ids[object_id] = game_id
+        if live_games_state.get(game_id) == doc:
+            return
+        live_games_state[game_id] = doc
 
-        # Retrieve live game data from the NBA API
-        scoreboard_data = scoreboard.ScoreBoard().get_dict()
-        games = scoreboard_data.get("scoreboard", {}).get("games", [])
+    notify_live_subscribers("update", doc)
 
-        if not games:
-            logging.warning("No live games found.")
-            return jsonify({"live_games": []})  # Return an empty list instead of an error
+def remove_live_game(object_id):
+    with live_games_lock:
+        game_id = live_game_ids.pop(object_id, None)
+        if game_id is None or live_games_state.pop(game_id, None) is None:
+            return
 
-        live_games_data = []
+    notify_live_subscribers("remove", {"gameId": game_id})
 
-        for game in games:
-            game_id = game.get("gameId", "N/A")
-            game_date_str = game.get("gameTimeUTC", "N/A")
-            game_date = datetime.strptime(game_date_str, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) if game_date_str != "N/A" else None
+def load_live_games_snapshot():
+    start, end = today_live_games_window()
+    docs = list(live_games_collection.find({"homeTeam": {"$exists": True}, "date": {"$gte": start, "$lt": end}}))
+    current_ids = {doc["_id"] for doc in docs}
 
-            home_team = game.get("homeTeam", {})
-            away_team = game.get("awayTeam", {})
+    with live_games_lock:
+        stale_ids = [object_id for object_id in live_game_ids if object_id not in current_ids]
+    for object_id in stale_ids:
+        remove_live_game(object_id)
 
-            live_game = {
-                "gameId": game_id,
-                "gameTimePST": convert_to_pst(game_date_str),
-                "period": game.get("period", 0),
-                "gameClock": format_game_clock(game.get("gameClock", "00:00")),  # Fix game clock
-                "status": convert_status_to_pst(game.get("gameStatusText", "Unknown")),
-                "homeTeam": {
-                    "teamId": home_team.get("teamId", "Unknown"),
-                    "teamName": home_team.get("teamName", "Unknown"),
-                    "teamTricode": home_team.get("teamTricode", "Unknown"),
-                    "score": home_team.get("score", 0),
-                    "wins": home_team.get("wins", 0),  # Added wins
-                    "losses": home_team.get("losses", 0),  # Added losses
-                },
-                "awayTeam": {
-                    "teamId": away_team.get("teamId", "Unknown"),
-                    "teamName": away_team.get("teamName", "Unknown"),
-                    "teamTricode": away_team.get("teamTricode", "Unknown"),
-                    "score": away_team.get("score", 0),
-                    "wins": away_team.get("wins", 0),  # Added wins
-                    "losses": away_team.get("losses", 0),  # Added losses
-                },
-                "arena": game.get("arena", {}).get("name", "Unknown"),
-                "location": {
-                    "city": game.get("arena", {}).get("city", "Unknown"),
-                    "state": game.get("arena", {}).get("stateAbbr", "Unknown"),
-                },
-                "attendance": game.get("attendance", 0),
-                "playoffs": game.get("playoffs", {}).get("seriesText", "N/A"),
-            }
+    for doc in docs:
+        set_live_game(doc)
 
-            live_games_data.append(live_game)
+def poll_live_games():
+    while True:
+        try:
+            load_live_games_snapshot()
+        except PyMongoError as e:
+            logging.error(f"Error polling LiveGames: {e}")
+        time.sleep(LIVE_STATE_POLL_INTERVAL)
+
+def watch_live_games():
+    """
+    Keeps live_games_state in sync with LiveGames through a change stream,
+    falling back to polling the collection when change streams are not
+    supported (e.g. a standalone server instead of a replica set). For local
+    testing, a single-node replica set is enough: `mongod --replSet rs0`
+    followed by `rs.initiate()` in mongosh.
+    """
+    resume_token = None
+
+    while True:
+        try:
+            with live_games_collection.watch(full_document="updateLookup", resume_after=resume_token) as stream:
+                # Load the snapshot after opening the stream so no change is missed in between
+                load_live_games_snapshot()
+                logging.info("Watching LiveGames change stream.")
+
+                for change in stream:
+                    resume_token = stream.resume_token
+                    operation = change["operationType"]
+
+                    if operation in ("insert", "update", "replace"):
+                        if change.get("fullDocument"):
+                            set_live_game(change["fullDocument"])
+                    elif operation == "delete":
+                        remove_live_game(change["documentKey"]["_id"])
+                    elif operation in ("drop", "invalidate"):
+                        resume_token = None
+                        break
+
+        except OperationFailure as e:
+            if resume_token is not None:
+                logging.warning(f"Could not resume LiveGames change stream ({e}), restarting it.")
+                resume_token = None
+                continue
+            logging.warning(f"Change streams unavailable ({e}), polling LiveGames instead.")
+            poll_live_games()
+        except PyMongoError as e:
+            logging.error(f"LiveGames change stream error: {e}")
+            time.sleep(LIVE_STATE_POLL_INTERVAL)
+
+@app.route("/live-games", methods=["GET"])
+def get_live_games():
+    try:
+        with live_games_lock:
+            live_games_data = list(live_games_state.values())
 
         logging.info(f"Sending {len(live_games_data)} live games to frontend.")
         return jsonify({"live_games": live_games_data})
@@ -384,113 +1082,159 @@ def get_live_games():
         logging.error(f"Error retrieving live game data: {str(e)}")
         return jsonify({"error": f"Error retrieving data: {str(e)}"}), 500
 
-# **Live Game Boxscore API Endpoint**
-@app.route("/game-boxscore/<game_id>", methods=["GET"])
-def get_game_boxscore(game_id):
-    try:
-        # Fetch boxscore data for the game
-        boxscore_data = boxscore.BoxScore(game_id).get_dict()
-        logging.info(f"Boxscore data for game {game_id}: {boxscore_data}")
-
-        game_data = boxscore_data.get("game", {})
+@app.route("/live-games/stream", methods=["GET"])
+def stream_live_games():
+    """
+    Server-sent events: a snapshot of all live games, then one event per change.
+    """
+    subscriber = queue.Queue(maxsize=100)
+    with live_subscribers_lock:
+        live_subscribers.add(subscriber)
+
+    with live_games_lock:
+        snapshot = list(live_games_state.values())
+
+    def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot, default=str)}\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+        finally:
+            with live_subscribers_lock:
+                live_subscribers.discard(subscriber)
+
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
-        # Get statistics for teams
-        home_team_data = game_data.get('homeTeam', {})
-        away_team_data = game_data.get('awayTeam', {})
+# **Live Game Boxscore API Endpoint**
+def build_game_boxscore(game_id):
+    """
+    Builds the /game-boxscore response body and whether the game is final,
+    or returns None when the game has no boxscore statistics yet.
+    """
+    # Fetch boxscore data for the game
+    boxscore_data = boxscore.BoxScore(game_id).get_dict()
+    logging.info(f"Boxscore data for game {game_id}: {boxscore_data}")
+
+    game_data = boxscore_data.get("game", {})
+
+    # Get statistics for teams
+    home_team_data = game_data.get('homeTeam', {})
+    away_team_data = game_data.get('awayTeam', {})
+
+    home_team_stats = home_team_data.get('statistics', {})
+    away_team_stats = away_team_data.get('statistics', {})
+
+    if not home_team_stats or not away_team_stats:
+        return None
+
+    # Function to extract quarter scores
+    def get_period_scores(team):
+        quarters = {"Q1": 0, "Q2": 0, "Q3": 0, "Q4": 0, "OT": 0}
+        for period in team.get("periods", []):
+            num = period.get("period", 0)
+            score = period.get("score", 0)
+            if 1 <= num <= 4:
+                quarters[f"Q{num}"] = score
+            else:
+                quarters["OT"] += score
+        return quarters
+
+    # Create summary stats and quarter scores
+    home_summary = {
+        "points": home_team_stats.get("points", 0),
+        "fieldGoalsMade": home_team_stats.get("fieldGoalsMade", 0),
+        "fieldGoalsAttempted": home_team_stats.get("fieldGoalsAttempted", 0),
+        "threePointersMade": home_team_stats.get("threePointersMade", 0),
+        "threePointersAttempted": home_team_stats.get("threePointersAttempted", 0),
+        "freeThrowsMade": home_team_stats.get("freeThrowsMade", 0),
+        "freeThrowsAttempted": home_team_stats.get("freeThrowsAttempted", 0),
+        "rebounds": home_team_stats.get("reboundsTotal", 0),
+        "assists": home_team_stats.get("assists", 0),
+        "steals": home_team_stats.get("steals", 0),
+        "blocks": home_team_stats.get("blocks", 0),
+        "turnovers": home_team_stats.get("turnovers", 0),
+        "quarters": get_period_scores(home_team_data)
+    }
 
-        home_team_stats = home_team_data.get('statistics', {})
-        away_team_stats = away_team_data.get('statistics', {})
+    away_summary = {
+        "points": away_team_stats.get("points", 0),
+        "fieldGoalsMade": away_team_stats.get("fieldGoalsMade", 0),
+        "fieldGoalsAttempted": away_team_stats.get("fieldGoalsAttempted", 0),
+        "threePointersMade": away_team_stats.get("threePointersMade", 0),
+        "threePointersAttempted": away_team_stats.get("threePointersAttempted", 0),
+        "freeThrowsMade": away_team_stats.get("freeThrowsMade", 0),
+        "freeThrowsAttempted": away_team_stats.get("freeThrowsAttempted", 0),
+        "rebounds": away_team_stats.get("reboundsTotal", 0),
+        "assists": away_team_stats.get("assists", 0),
+        "steals": away_team_stats.get("steals", 0),
+        "blocks": away_team_stats.get("blocks", 0),
+        "turnovers": away_team_stats.get("turnovers", 0),
+        "quarters": get_period_scores(away_team_data)
+    }
 
-        if not home_team_stats or not away_team_stats:
-            return jsonify({"error": "No boxscore data found for this game."}), 404
+    # Extract player stats
+    def extract_players(players):
+        return [
+            {
+                "name": p.get("name", "Unknown"),
+                "points": p.get("statistics", {}).get("points", 0),
+                "assists": p.get("statistics", {}).get("assists", 0),
+                "rebounds": p.get("statistics", {}).get("reboundsTotal", 0),
+                "fieldGoalsAttempted": p.get("statistics", {}).get("fieldGoalsAttempted", 0),
+                "fieldGoalsMade": p.get("statistics", {}).get("fieldGoalsMade", 0),
+                "fieldGoalsPercentage": p.get("statistics", {}).get("fieldGoalsPercentage", 0),
+                "threePointersAttempted": p.get("statistics", {}).get("threePointersAttempted", 0),
+                "threePointersMade": p.get("statistics", {}).get("threePointersMade", 0),
+                "threePointersPercentage": p.get("statistics", {}).get("threePointersPercentage", 0),
+                "freeThrowsAttempted": p.get("statistics", {}).get("freeThrowsAttempted", 0),
+                "freeThrowsMade": p.get("statistics", {}).get("freeThrowsMade", 0),
+                "freeThrowsPercentage": p.get("statistics", {}).get("freeThrowsPercentage", 0),
+                "steals": p.get("statistics", {}).get("steals", 0),
+                "blocks": p.get("statistics", {}).get("blocks", 0),
+                "turnovers": p.get("statistics", {}).get("turnovers", 0),
+                "starter": p.get("starter", 0),
+            }
+            for p in players
+        ]
 
-        # Function to extract quarter scores
-        def get_period_scores(team):
-            quarters = {"Q1": 0, "Q2": 0, "Q3": 0, "Q4": 0, "OT": 0}
-            for period in team.get("periods", []):
-                num = period.get("period", 0)
-                score = period.get("score", 0)
-                if 1 <= num <= 4:
-                    quarters[f"Q{num}"] = score
-                else:
-                    quarters["OT"] += score
-            return quarters
-
-        # Create summary stats and quarter scores
-        home_summary = {
-            "points": home_team_stats.get("points", 0),
-            "fieldGoalsMade": home_team_stats.get("fieldGoalsMade", 0),
-            "fieldGoalsAttempted": home_team_stats.get("fieldGoalsAttempted", 0),
-            "threePointersMade": home_team_stats.get("threePointersMade", 0),
-            "threePointersAttempted": home_team_stats.get("threePointersAttempted", 0),
-            "freeThrowsMade": home_team_stats.get("freeThrowsMade", 0),
-            "freeThrowsAttempted": home_team_stats.get("freeThrowsAttempted", 0),
-            "rebounds": home_team_stats.get("reboundsTotal", 0),
-            "assists": home_team_stats.get("assists", 0),
-            "steals": home_team_stats.get("steals", 0),
-            "blocks": home_team_stats.get("blocks", 0),
-            "turnovers": home_team_stats.get("turnovers", 0),
-            "quarters": get_period_scores(home_team_data)
+    game_boxscore = {
+        "gameId": game_id,
+        "homeTeam": {
+            "teamName": home_team_data.get("teamName", "Unknown"),
+            "score": home_team_stats.get("points", 0),
+            "summary": home_summary,
+            "players": extract_players(home_team_data.get("players", []))
+        },
+        "awayTeam": {
+            "teamName": away_team_data.get("teamName", "Unknown"),
+            "score": away_team_stats.get("points", 0),
+            "summary": away_summary,
+            "players": extract_players(away_team_data.get("players", []))
         }
+    }
 
-        away_summary = {
-            "points": away_team_stats.get("points", 0),
-            "fieldGoalsMade": away_team_stats.get("fieldGoalsMade", 0),
-            "fieldGoalsAttempted": away_team_stats.get("fieldGoalsAttempted", 0),
-            "threePointersMade": away_team_stats.get("threePointersMade", 0),
-            "threePointersAttempted": away_team_stats.get("threePointersAttempted", 0),
-            "freeThrowsMade": away_team_stats.get("freeThrowsMade", 0),
-            "freeThrowsAttempted": away_team_stats.get("freeThrowsAttempted", 0),
-            "rebounds": away_team_stats.get("reboundsTotal", 0),
-            "assists": away_team_stats.get("assists", 0),
-            "steals": away_team_stats.get("steals", 0),
-            "blocks": away_team_stats.get("blocks", 0),
-            "turnovers": away_team_stats.get("turnovers", 0),
-            "quarters": get_period_scores(away_team_data)
-        }
+    return game_boxscore, game_data.get("gameStatus") == 3
 
-        # Extract player stats
-        def extract_players(players):
-            return [
-                {
-                    "name": p.get("name", "Unknown"),
-                    "points": p.get("statistics", {}).get("points", 0),
-                    "assists": p.get("statistics", {}).get("assists", 0),
-                    "rebounds": p.get("statistics", {}).get("reboundsTotal", 0),
-                    "fieldGoalsAttempted": p.get("statistics", {}).get("fieldGoalsAttempted", 0),
-                    "fieldGoalsMade": p.get("statistics", {}).get("fieldGoalsMade", 0),
-                    "fieldGoalsPercentage": p.get("statistics", {}).get("fieldGoalsPercentage", 0),
-                    "threePointersAttempted": p.get("statistics", {}).get("threePointersAttempted", 0),
-                    "threePointersMade": p.get("statistics", {}).get("threePointersMade", 0),
-                    "threePointersPercentage": p.get("statistics", {}).get("threePointersPercentage", 0),
-                    "freeThrowsAttempted": p.get("statistics", {}).get("freeThrowsAttempted", 0),
-                    "freeThrowsMade": p.get("statistics", {}).get("freeThrowsMade", 0),
-                    "freeThrowsPercentage": p.get("statistics", {}).get("freeThrowsPercentage", 0),
-                    "steals": p.get("statistics", {}).get("steals", 0),
-                    "blocks": p.get("statistics", {}).get("blocks", 0),
-                    "turnovers": p.get("statistics", {}).get("turnovers", 0),
-                    "starter": p.get("starter", 0),
-                }
-                for p in players
-            ]
+def get_game_boxscore_data(game_id, refresh=False):
+    # Live boxscores change every possession, final ones never do
+    return cached_fetch(
+        ("boxscore", game_id),
+        lambda result: BOXSCORE_FINAL_TTL if result and result[1] else BOXSCORE_TTL,
+        lambda: build_game_boxscore(game_id),
+        refresh
+    )
 
-        game_boxscore = {
-            "gameId": game_id,
-            "homeTeam": {
-                "teamName": home_team_data.get("teamName", "Unknown"),
-                "score": home_team_stats.get("points", 0),
-                "summary": home_summary,
-                "players": extract_players(home_team_data.get("players", []))
-            },
-            "awayTeam": {
-                "teamName": away_team_data.get("teamName", "Unknown"),
-                "score": away_team_stats.get("points", 0),
-                "summary": away_summary,
-                "players": extract_players(away_team_data.get("players", []))
-            }
-        }
+@app.route("/game-boxscore/<game_id>", methods=["GET"])
+def get_game_boxscore(game_id):
+    try:
+        result = get_game_boxscore_data(game_id)
+        if result is None:
+            return jsonify({"error": "No boxscore data found for this game."}), 404
 
-        return jsonify(game_boxscore)
+        return jsonify(result[0])
 
     except Exception as e:
         logging.error(f"Error fetching game boxscore: {str(e)}")
@@ -607,8 +1351,7 @@ def get_player_career_stats(player_id):
 @app.route("/standings", methods=["GET"])
 def get_standings():
     try:
-        standings = leaguestandingsv3.LeagueStandingsV3(season="2024-25", season_type="Regular Season")
-        data = standings.get_data_frames()[0]
+        data = get_standings_frame()
 
         data_cleaned = data.replace({np.nan: None, pd.NaT: None})
 
@@ -622,19 +1365,8 @@ def get_standings():
 def get_team_info(team_code):
     from nba_api.stats.static import teams
 
-    team_code_to_id = {
-        "ATL": 1610612737, "BOS": 1610612738, "BKN": 1610612751, "CHA": 1610612766,
-        "CHI": 1610612741, "CLE": 1610612739, "DAL": 1610612742, "DEN": 1610612743,
-        "DET": 1610612765, "GSW": 1610612744, "HOU": 1610612745, "IND": 1610612754,
-        "LAC": 1610612746, "LAL": 1610612747, "MEM": 1610612763, "MIA": 1610612748,
-        "MIL": 1610612749, "MIN": 1610612750, "NOP": 1610612740, "NYK": 1610612752,
-        "OKC": 1610612760, "ORL": 1610612753, "PHI": 1610612755, "PHX": 1610612756,
-        "POR": 1610612757, "SAC": 1610612758, "SAS": 1610612759, "TOR": 1610612761,
-        "UTA": 1610612762, "WAS": 1610612764,
-    }
-
     try:
-        team_id = team_code_to_id.get(team_code.upper())
+        team_id = TEAM_CODE_TO_ID.get(team_code.upper())
         if not team_id:
             return jsonify({"error": "Invalid team code"}), 400
 
@@ -643,7 +1375,27 @@ def get_team_info(team_code):
         team = next(t for t in teams.get_teams() if t["id"] == team_id)
         logging.info(f"Team found: {team}")
 
-        standings_data = leaguestandingsv3.LeagueStandingsV3(season="2024-25").get_data_frames()[0]
+        # Served from the materialized aggregates once the season has been fully built
+        aggregates = get_team_aggregates(team_id, {"_id": 0, "games": 0})
+        if aggregates and aggregates.get("complete"):
+            return jsonify({
+                "id": team_id,
+                "full_name": team["full_name"],
+                "abbreviation": team["abbreviation"],
+                "conference": aggregates.get("conference"),
+                "division": aggregates.get("division"),
+                "wins": aggregates["wins"],
+                "losses": aggregates["losses"],
+                "home": aggregates.get("home", {"wins": 0, "losses": 0}),
+                "away": aggregates.get("away", {"wins": 0, "losses": 0}),
+                "pointsFor": aggregates["pointsFor"],
+                "pointsAgainst": aggregates["pointsAgainst"],
+                "last10": aggregates["last10"],
+                "streak": aggregates["streak"],
+                "headToHead": aggregates.get("headToHead", {}),
+            })
+
+        standings_data = get_standings_frame()
 
         logging.info(f"Standings data retrieved with shape: {standings_data.shape}")
 
@@ -669,53 +1421,32 @@ def get_team_info(team_code):
 
 @app.route("/team-roster/<team_code>", methods=["GET"])
 def get_team_roster(team_code):
-    from nba_api.stats.endpoints import commonteamroster
-
-    team_code_to_id = {
-        "ATL": 1610612737, "BOS": 1610612738, "BKN": 1610612751, "CHA": 1610612766,
-        "CHI": 1610612741, "CLE": 1610612739, "DAL": 1610612742, "DEN": 1610612743,
-        "DET": 1610612765, "GSW": 1610612744, "HOU": 1610612745, "IND": 1610612754,
-        "LAC": 1610612746, "LAL": 1610612747, "MEM": 1610612763, "MIA": 1610612748,
-        "MIL": 1610612749, "MIN": 1610612750, "NOP": 1610612740, "NYK": 1610612752,
-        "OKC": 1610612760, "ORL": 1610612753, "PHI": 1610612755, "PHX": 1610612756,
-        "POR": 1610612757, "SAC": 1610612758, "SAS": 1610612759, "TOR": 1610612761,
-        "UTA": 1610612762, "WAS": 1610612764,
-    }
-
     try:
-        team_id = team_code_to_id.get(team_code.upper())
+        team_id = TEAM_CODE_TO_ID.get(team_code.upper())
         if not team_id:
             return jsonify({"error": "Invalid team code"}), 400
 
-        data = commonteamroster.CommonTeamRoster(team_id=team_id).get_dict()
-
-        players = [
-            {
-                "id": row[14],  # PERSON_ID
-                "name": row[3],
-                "number": row[6],
-                "position": row[7]
-            }
-            for row in data["resultSets"][0]["rowSet"]
-        ]
-        return jsonify({"roster": players})
+        return jsonify({"roster": get_team_roster_data(team_id)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
         
 
 @app.route("/team-games/<team_code>", methods=["GET"])
 def get_team_games(team_code):
-    from nba_api.stats.static import teams
     from nba_api.stats.endpoints import teamgamelog
 
-    team_map = {t["abbreviation"]: t["id"] for t in teams.get_teams()}
-    team_id = team_map.get(team_code.upper())
+    team_id = TEAM_CODE_TO_ID.get(team_code.upper())
 
     if not team_id:
         return jsonify({"error": "Invalid team code"}), 400
 
     try:
-        log = teamgamelog.TeamGameLog(team_id=team_id, season="2024-25")
+        # Served from the materialized aggregates once the season has been fully built, most recent first
+        aggregates = get_team_aggregates(team_id, {"_id": 0, "games": 1, "complete": 1})
+        if aggregates and aggregates.get("complete"):
+            return jsonify({"games": aggregates["games"][::-1]})
+
+        log = teamgamelog.TeamGameLog(team_id=team_id, season=CURRENT_SEASON)
         df = log.get_data_frames()[0]
 
         games = []
@@ -733,60 +1464,444 @@ def get_team_games(team_code):
         traceback.print_exc() 
         return jsonify({"error": str(e)}), 500
     
+# **Player and Team Search Index**
+SEARCH_RESULT_LIMIT = 10
+
+def fold_name(text):
+    """
+    Lowercases and strips accents so "Jokić" and "jokic" index the same.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+def build_search_index():
+    """
+    Builds sorted (key, entry) arrays over all teams and players, searched by
+    prefix with bisect. Entries are split into tiers — teams, active players,
+    then inactive players — so higher tiers fill the result list first.
+    Every word suffix of a name is indexed, so "james" finds "LeBron James".
+    """
+    from nba_api.stats.static import players, teams
+
+    tiers = [[], [], []]
+
+    def add(tier, names, entry):
+        keys = set()
+        for name in names:
+            words = fold_name(name).split()
+            keys.update(" ".join(words[i:]) for i in range(len(words)))
+        tiers[tier].extend((key, entry) for key in keys if key)
+
+    for team in teams.get_teams():
+        add(0, [team["full_name"], team["abbreviation"], team["nickname"]], {
+            "type": "team",
+            "id": team["id"],
+            "name": team["full_name"],
+            "abbreviation": team["abbreviation"],
+        })
+
+    for player in players.get_players():
+        add(1 if player["is_active"] else 2, [player["full_name"]], {
+            "type": "player",
+            "id": player["id"],
+            "name": player["full_name"],
+            "isActive": player["is_active"],
+        })
+
+    index = []
+    for tier in tiers:
+        tier.sort(key=lambda item: (item[0], item[1]["name"]))
+        index.append(([key for key, _ in tier], [entry for _, entry in tier]))
+
+    logging.info(f"Search index built with {sum(len(keys) for keys, _ in index)} keys.")
+    return index
+
+def search_index_lookup(index, query, limit=SEARCH_RESULT_LIMIT):
+    prefix = fold_name(query)
+    if not prefix:
+        return []
+
+    results = []
+    seen = set()
+    for keys, entries in index:
+        position = bisect.bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            entry = entries[position]
+            identity = (entry["type"], entry["id"])
+            if identity not in seen:
+                seen.add(identity)
+                results.append(entry)
+                if len(results) >= limit:
+                    return results
+            position += 1
+
+    return results
+
+search_index = build_search_index()
+
+@app.route("/search", methods=["GET"])
+def search():
+    try:
+        query = request.args.get("q", "")
+        limit = max(1, min(request.args.get("limit", SEARCH_RESULT_LIMIT, type=int), 50))
+
+        return jsonify({"results": search_index_lookup(search_index, query, limit)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# **Compact Play-by-Play Storage**
+PBP_MAX_GAMES = 30  # Games kept hot in memory
+PBP_MAX_ACTIONS = 30000  # Actions kept hot in memory across all games
+
+PLAY_ACTION_FIELDS = (
+    "actionNumber", "clock", "timeActual", "period", "teamTricode", "actionType",
+    "subType", "descriptor", "qualifiers", "playerName", "shotResult", "pointsTotal",
+    "description", "scoreHome", "scoreAway", "assistPlayerName", "assistPersonId", "assistTotal",
+)
+
+# Repeated across thousands of actions, so they share one interned copy
+INTERNED_FIELDS = {
+    "clock", "teamTricode", "actionType", "subType", "descriptor",
+    "playerName", "shotResult", "scoreHome", "scoreAway", "assistPlayerName",
+}
+
+def intern_value(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class PlayAction:
+    """
+    Slotted play-by-play action. Repeated strings are interned and
+    qualifiers are stored as a tuple of interned strings.
+    """
+    __slots__ = PLAY_ACTION_FIELDS
+
+    def __init__(self, values):
+        for field, value in zip(PLAY_ACTION_FIELDS, values):
+            if field == "qualifiers":
+                value = tuple(intern_value(q) for q in value) if value else ()
+            elif field in INTERNED_FIELDS:
+                value = intern_value(value)
+            setattr(self, field, value)
+
+    @classmethod
+    def from_api(cls, action):
+        return cls([action.get(field) for field in PLAY_ACTION_FIELDS])
+
+    def to_row(self):
+        return [list(self.qualifiers) if field == "qualifiers" else getattr(self, field) for field in PLAY_ACTION_FIELDS]
+
+    def to_dict(self):
+        return dict(zip(PLAY_ACTION_FIELDS, self.to_row()))
+
+    def size_bytes(self):
+        """
+        Bytes owned by this action: the record, its qualifiers tuple and its
+        non-interned values. Interned strings are counted once in the cache report.
+        """
+        size = sys.getsizeof(self) + sys.getsizeof(self.qualifiers)
+        for field in PLAY_ACTION_FIELDS:
+            if field != "qualifiers" and field not in INTERNED_FIELDS:
+                size += sys.getsizeof(getattr(self, field))
+        return size
+
+def is_game_over(actions):
+    return bool(actions) and actions[-1].actionType == "game" and actions[-1].subType == "end"
+
+class PlayByPlayCache:
+    """
+    LRU cache of compact play-by-play per game, bounded by game count and
+    total actions. Finished games are evicted before games still in progress.
+    """
+    def __init__(self, max_games=PBP_MAX_GAMES, max_actions=PBP_MAX_ACTIONS):
+        self.max_games = max_games
+        self.max_actions = max_actions
+        self.games = OrderedDict()  # gameId -> (actions, final)
+        self.action_count = 0
+        self.lock = threading.Lock()
+
+    def get(self, game_id):
+        with self.lock:
+            entry = self.games.get(game_id)
+            if entry is not None:
+                self.games.move_to_end(game_id)
+            return entry
+
+    def put(self, game_id, actions, final):
+        with self.lock:
+            previous = self.games.pop(game_id, None)
+            if previous is not None:
+                self.action_count -= len(previous[0])
+            self.games[game_id] = (actions, final)
+            self.action_count += len(actions)
+            self.evict(keep=game_id)
+
+    def evict(self, keep=None):
+        while len(self.games) > self.max_games or self.action_count > self.max_actions:
+            # Least recently used finished game first, else least recently used game,
+            # never the game that was just stored
+            candidates = [(gid, final) for gid, (_, final) in self.games.items() if gid != keep]
+            if not candidates:
+                break
+            victim = next((gid for gid, final in candidates if final), candidates[0][0])
+            actions, _ = self.games.pop(victim)
+            self.action_count -= len(actions)
+            logging.info(f"Evicted play-by-play for game {victim} ({len(actions)} actions).")
+
+    def memory_report(self):
+        with self.lock:
+            games = list(self.games.items())
+
+        interned = set()
+        report = []
+        for game_id, (actions, final) in games:
+            report.append({
+                "gameId": game_id,
+                "final": final,
+                "actions": len(actions),
+                "bytes": sys.getsizeof(actions) + sum(action.size_bytes() for action in actions),
+            })
+            for action in actions:
+                interned.update(getattr(action, field) for field in INTERNED_FIELDS)
+                interned.update(action.qualifiers)
+
+        interned.discard(None)
+        return {
+            "games": report,
+            "totalActions": sum(game["actions"] for game in report),
+            "totalBytes": sum(game["bytes"] for game in report),
+            "sharedStringBytes": sum(sys.getsizeof(value) for value in interned),
+            "limits": {"maxGames": self.max_games, "maxActions": self.max_actions},
+        }
+
+play_by_play_cache = PlayByPlayCache()
+
+play_by_play_index_ready = False
+
+def ensure_play_by_play_index():
+    """
+    Unique gameId index, so lookups are indexed and concurrent upserts cannot
+    create a second document for a game. Duplicates left by earlier upserts
+    are dropped first; play-by-play can always be refetched.
+    """
+    global play_by_play_index_ready
+    if play_by_play_index_ready:
+        return
+
+    duplicates = play_by_play_collection.aggregate([
+        {"$group": {"_id": "$gameId", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    for group in duplicates:
+        play_by_play_collection.delete_many({"_id": {"$in": group["ids"][1:]}})
+
+    play_by_play_collection.create_index("gameId", unique=True)
+    play_by_play_index_ready = True
+
+def save_play_by_play(game_id, actions, final):
+    """
+    Stores actions as positional rows under a single field header, instead of
+    one keyed object per action.
+    """
+    ensure_play_by_play_index()
+    update = {"$set": {
+        "fields": list(PLAY_ACTION_FIELDS),
+        "rows": [action.to_row() for action in actions],
+        "final": final,
+    }}
+    try:
+        play_by_play_collection.update_one({"gameId": game_id}, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent request inserted the document first; update it instead
+        play_by_play_collection.update_one({"gameId": game_id}, update)
+
+def load_play_by_play(game_id):
+    ensure_play_by_play_index()
+    doc = play_by_play_collection.find_one({"gameId": game_id, "final": True})
+    if not doc:
+        return None
+    # Rows follow the stored header, which may predate a change to PLAY_ACTION_FIELDS
+    positions = [doc["fields"].index(field) if field in doc["fields"] else None for field in PLAY_ACTION_FIELDS]
+    return [PlayAction([row[i] if i is not None else None for i in positions]) for row in doc["rows"]]
+
+def get_play_actions(game_id):
+    """
+    Returns (actions, final) for a game: finished games come from memory or
+    Mongo, games in progress are refreshed from the NBA API.
+    """
+    cached = play_by_play_cache.get(game_id)
+    if cached is not None and cached[1]:
+        return cached
+
+    if cached is None:
+        stored = load_play_by_play(game_id)
+        if stored:
+            play_by_play_cache.put(game_id, stored, True)
+            return stored, True
+
+    playbyplay_data = playbyplay.PlayByPlay(game_id).get_dict()
+    logging.info(f"Play-by-Play Data for game {game_id} received.")
+
+    actions = [PlayAction.from_api(action) for action in playbyplay_data.get('game', {}).get('actions', [])]
+    if not actions:
+        return actions, False
+
+    final = is_game_over(actions)
+    play_by_play_cache.put(game_id, actions, final)
+
+    if cached is None or len(cached[0]) != len(actions) or final:
+        save_play_by_play(game_id, actions, final)
+
+    return actions, final
+
 # **Live Game Play-by-Play API Endpoint**
 @app.route("/game-playbyplay/<game_id>", methods=["GET"])
 def get_game_playbyplay(game_id):
     try:
-        # Fetch play-by-play data
-        playbyplay_data = playbyplay.PlayByPlay(game_id).get_dict()
-
-        logging.info(f"Play-by-Play Data for game {game_id} received.")
-
-        # Safely get the actions list
-        actions = playbyplay_data.get('game', {}).get('actions', [])
+        actions, _ = get_play_actions(game_id)
 
         if not actions:
             logging.warning(f"No play-by-play actions found for game {game_id}")
             return jsonify({"error": "No play-by-play actions data found for this game."}), 404
 
-        # Extract relevant fields
-        detailed_actions = []
-        for action in actions:
-            detailed_actions.append({
-                "actionNumber": action.get("actionNumber"),
-                "clock": action.get("clock"),
-                "timeActual": action.get("timeActual"),
-                "period": action.get("period"),
-                "teamTricode": action.get("teamTricode"),
-                "actionType": action.get("actionType"),
-                "subType": action.get("subType"),
-                "descriptor": action.get("descriptor"),
-                "qualifiers": action.get("qualifiers"),
-                "playerName": action.get("playerName"),
-                "shotResult": action.get("shotResult"),
-                "pointsTotal": action.get("pointsTotal"),
-                "description": action.get("description"),
-                "scoreHome": action.get("scoreHome"),
-                "scoreAway": action.get("scoreAway"),
-                "assistPlayerName": action.get("assistPlayerName"),
-                "assistPersonId": action.get("assistPersonId"),
-                "assistTotal": action.get("assistTotal"),
-            })
-
-        # Store in MongoDB (optional)
-        live_games_collection.update_one(
-            {"gameId": game_id},
-            {"$set": {"actions": detailed_actions}},
-            upsert=True
-        )
-
-        return jsonify({"play_by_play": detailed_actions})
+        return jsonify({"play_by_play": [action.to_dict() for action in actions]})
 
     except Exception as e:
         logging.error(f"Error fetching play-by-play data: {str(e)}")
         return jsonify({"error": f"Error retrieving play-by-play data: {str(e)}"}), 500
 
+@app.route("/playbyplay-memory", methods=["GET"])
+def get_playbyplay_memory():
+    try:
+        return jsonify(play_by_play_cache.memory_report())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# **Schedule-Driven Cache Warm-Up**
+PREFETCH_TICK = 30  # Seconds between schedule checks
+PREFETCH_TIPOFF_LEAD = timedelta(minutes=5)  # Shorter than STANDINGS_TTL, so warmed standings outlast tip-off
+PREFETCH_STANDINGS_DELAY = timedelta(minutes=5)  # Upstream standings lag the final buzzer
+PREFETCH_MIDNIGHT_LEAD = timedelta(minutes=5)  # Shorter than SCHEDULED_GAMES_TTL and SCOREBOARD_FUTURE_TTL
+
+def warm(label, fetch):
+    try:
+        fetch()
+        logging.info(f"Prefetched {label}.")
+    except Exception as e:
+        logging.warning(f"Prefetch of {label} failed: {e}")
+
+def game_tipoff(game):
+    tipoff = game.get("date")
+    if not isinstance(tipoff, datetime):
+        return None
+    return tipoff if tipoff.tzinfo else tipoff.replace(tzinfo=timezone.utc)  # Mongo returns naive UTC datetimes
+
+def warm_for_tipoff(game):
+    # Boxscores are not warmed here: there is nothing to show before tip-off
+    # and a live boxscore would expire long before the first user arrives
+    warm("standings", lambda: get_standings_frame(refresh=True))
+    for team in (game["homeTeam"], game["awayTeam"]):
+        warm(f"roster for {team['teamTricode']}", lambda: get_team_roster_data(int(team["teamId"]), refresh=True))
+
+def warm_after_final(game_id, today):
+    warm(f"final boxscore for game {game_id}", lambda: get_game_boxscore_data(game_id, refresh=True))
+    warm("standings", lambda: get_standings_frame(refresh=True))
+    warm(f"scoreboard for {today}", lambda: get_scoreboard_frames(today, refresh=True))
+
+def warm_before_midnight(today):
+    # After midnight, tomorrow becomes today and the day after becomes tomorrow
+    for offset in (1, 2):
+        game_date = today + timedelta(days=offset)
+        warm(f"scheduled games for {game_date}", lambda: build_scheduled_games(game_date, refresh=True))
+
+def prefetch_tick(state):
+    """
+    Today's schedule comes from the shared live game state (tip-off time and
+    status per game), so no instance polls ScoreboardV2 to drive it. Upstream
+    calls are made only when an event fires.
+    """
+    now = datetime.now(timezone.utc)
+    today = get_today_pst()
+    if state.get("day") != today:
+        state.update(day=today, done=set(), final_seen={})
+    done, final_seen = state["done"], state["final_seen"]
+
+    with live_games_lock:
+        # Yesterday's games linger until the ingester archives them; their events already fired
+        games = [game for game in live_games_state.values() if is_today_live_game(game)]
+
+    for game in games:
+        game_id = game["gameId"]
+
+        tipoff = game_tipoff(game)
+        if (tipoff and game.get("gameStatus") == 1 and ("tipoff", game_id) not in done
+                and now >= tipoff - PREFETCH_TIPOFF_LEAD):
+            done.add(("tipoff", game_id))
+            warm_for_tipoff(game)
+
+        if game.get("gameStatus") == 3 and ("final", game_id) not in done:
+            done.add(("final", game_id))
+            final_seen[game_id] = now
+            warm_after_final(game_id, today)
+
+        if game_id in final_seen and ("standings", game_id) not in done and now - final_seen[game_id] >= PREFETCH_STANDINGS_DELAY:
+            done.add(("standings", game_id))
+            warm("standings", lambda: get_standings_frame(refresh=True))
+
+    midnight = PST.localize(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+    if "midnight" not in done and now >= midnight - PREFETCH_MIDNIGHT_LEAD:
+        done.add("midnight")
+        warm_before_midnight(today)
+
+def run_prefetch_scheduler():
+    """
+    Warms this process's caches around the day's schedule: standings and
+    rosters shortly before tip-off, final boxscores and standings after the
+    buzzer, and the next days' scheduled games just before midnight PST.
+    """
+    state = {}
+    while True:
+        try:
+            prefetch_tick(state)
+        except Exception as e:
+            logging.error(f"Error in prefetch scheduler: {e}")
+        time.sleep(PREFETCH_TICK)
+
+# **Background Workers**
+background_started = False
+background_lock = threading.Lock()
+
+def start_background_threads():
+    """
+    Starts the ingester (unless LIVE_INGESTER=false), the LiveGames follower
+    and the prefetch scheduler once per process. Called at startup by the
+    serving process of `python app.py` and on the first request under
+    `flask run` or a WSGI server.
+    """
+    global background_started
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+
+    if LIVE_INGESTER:
+        threading.Thread(target=run_live_ingester, daemon=True).start()  # Poll NBA API into LiveGames
+        threading.Thread(target=move_past_games, daemon=True).start()  # Move past games at midnight
+
+    # Load the current games up front so the first request is not served an empty list
+    try:
+        load_live_games_snapshot()
+    except PyMongoError as e:
+        logging.error(f"Error loading LiveGames snapshot: {e}")
+    threading.Thread(target=watch_live_games, daemon=True).start()  # Follow LiveGames into memory
+    threading.Thread(target=run_prefetch_scheduler, daemon=True).start()  # Warm caches around the schedule
+
+@app.before_request
+def ensure_background_threads():
+    start_background_threads()
+
 if __name__ == "__main__":
-    fetch_live_games()  # Fetch initial live games data
-    threading.Thread(target=move_past_games, daemon=True).start()  # Move past games at midnight
+    # With debug=True the reloader runs this module twice; only the child
+    # process that serves requests (WERKZEUG_RUN_MAIN set) starts the workers
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_threads()
     app.run(port=5000, debug=True)
\ No newline at end of file